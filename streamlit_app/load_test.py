@@ -0,0 +1,581 @@
+"""Concurrent-session load test for the Netflix Analytics Dashboard.
+
+Launches ``netflix_dashboard.py`` with ``streamlit run`` on a local port and
+drives many simulated browser sessions against it over Streamlit's websocket
+protocol. Each session performs a scripted mix of filter changes, searches and
+title predictions; every action triggers a full script rerun. Filter changes
+are only applied when the catalog still has matching titles, so the dashboard
+does not ``st.stop()`` early and every measured rerun renders all five tabs
+on the server (tab switches in the browser cost nothing extra). Any rerun
+that still hits the "no data" warning is counted separately and kept out of
+the latency figures.
+
+For every catalog size / concurrency level we record p50/p95/p99 rerun latency,
+throughput and the resident memory of the Streamlit server process, along with
+reruns that timed out and sessions that lost their connection. Results are
+written to ``load_test_results/<label>.json`` so runs can be compared across
+versions of the dashboard; the default label is the git revision, suffixed
+with ``-dirty`` when the working tree has uncommitted changes.
+
+Usage (from the ``streamlit_app`` directory):
+
+    pip install -r requirements.txt -r requirements-loadtest.txt
+    python load_test.py --sessions 1,5,10,25 --catalog-multipliers 1,4
+    python load_test.py --compare load_test_results/a.json load_test_results/b.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import psutil
+import streamlit
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_SCRIPT = 'netflix_dashboard.py'
+DATASET = 'netflix_titles.csv'
+RESULTS_DIR = os.path.join(APP_DIR, 'load_test_results')
+
+# Widget labels in netflix_dashboard.py (matched as substrings, emojis aside)
+WIDGET_LABELS = {
+    'type': 'Content Type',
+    'countries': 'Countries',
+    'years': 'Release Year Range',
+    'ratings': 'Content Ratings',
+    'predict_input': 'Enter Netflix Title',
+    'predict_button': 'Predict Type',
+    'search': 'Search titles',
+}
+
+# Sidebar filters changed by the scripted actions
+FILTER_ACTIONS = {
+    'filter_type': 'type',
+    'filter_countries': 'countries',
+    'filter_years': 'years',
+    'filter_ratings': 'ratings',
+}
+MAX_FILTER_TRIES = 20
+
+# Warning shown by the dashboard right before it stops on an empty selection
+NO_DATA_WARNING = 'No data matches your current filters'
+
+# Scripted user actions and their relative frequency
+ACTIONS = {
+    'filter_type': 1,
+    'filter_countries': 3,
+    'filter_years': 3,
+    'filter_ratings': 2,
+    'search': 3,
+    'predict': 2,
+}
+
+WIDGET_KINDS = ('multiselect', 'slider', 'text_input', 'button')
+SCRIPT_ERRORS = (ForwardMsg.FINISHED_WITH_COMPILE_ERROR,)
+
+
+class DashboardSession:
+    """One simulated browser tab connected to the dashboard."""
+
+    def __init__(self, ws, timeout):
+        self.ws = ws
+        self.timeout = timeout
+        self.widgets = {}  # label -> (kind, element proto)
+        self.states = {}   # widget id -> WidgetState sent on every rerun
+        self.filters = {}  # filter key -> current selection
+        self.page_script_hash = ''
+        self.exceptions = 0
+        self.stopped_early = False
+
+    async def rerun(self, trigger_id=None):
+        """Request a rerun with the current widget states and time it.
+
+        Returns ``(seconds, ok, stopped_early)``, where ``stopped_early`` means
+        the dashboard hit its empty-selection warning and skipped the tabs.
+        """
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.page_script_hash = self.page_script_hash
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        if trigger_id is not None:
+            trigger = msg.rerun_script.widget_states.widgets.add()
+            trigger.id = trigger_id
+            trigger.trigger_value = True
+
+        self.stopped_early = False
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        ok = await asyncio.wait_for(self._read_until_finished(), self.timeout)
+        return time.perf_counter() - start, ok, self.stopped_early
+
+    async def _read_until_finished(self):
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self.ws.recv())
+            kind = msg.WhichOneof('type')
+
+            if kind == 'new_session':
+                self.page_script_hash = msg.new_session.page_script_hash
+            elif kind == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+                self._register(msg.delta.new_element)
+            elif kind == 'script_finished':
+                # An auto-started run may be superseded by ours; keep waiting
+                if msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                return msg.script_finished not in SCRIPT_ERRORS
+
+    def _register(self, element):
+        kind = element.WhichOneof('type')
+        if kind == 'exception':
+            self.exceptions += 1
+        elif kind == 'alert' and NO_DATA_WARNING in element.alert.body:
+            self.stopped_early = True
+        elif kind in WIDGET_KINDS:
+            proto = getattr(element, kind)
+            self.widgets.setdefault(proto.label, (kind, proto))
+
+    def widget(self, key):
+        for label, (_, proto) in self.widgets.items():
+            if WIDGET_LABELS[key] in label:
+                return proto
+        raise LookupError(f"Widget '{WIDGET_LABELS[key]}' was not rendered by the dashboard")
+
+    def set_multiselect(self, key, values):
+        proto = self.widget(key)
+        state = WidgetState(id=proto.id)
+        # Newer Streamlit versions send selected option strings, older ones indices
+        if 'raw_values' in proto.DESCRIPTOR.fields_by_name:
+            state.string_array_value.data.extend(values)
+        else:
+            options = list(proto.options)
+            state.int_array_value.data.extend(options.index(v) for v in values)
+        self.states[proto.id] = state
+
+    def set_slider(self, key, low, high):
+        proto = self.widget(key)
+        state = WidgetState(id=proto.id)
+        state.double_array_value.data.extend([low, high])
+        self.states[proto.id] = state
+
+    def filter_value(self, key):
+        """Current selection of a sidebar filter, starting from its default."""
+        if key not in self.filters:
+            proto = self.widget(key)
+            if key == 'years':
+                self.filters[key] = tuple(proto.default)
+            else:
+                self.filters[key] = [proto.options[i] for i in proto.default]
+        return self.filters[key]
+
+    def set_filter(self, key, value):
+        self.filters[key] = value
+        if key == 'years':
+            self.set_slider(key, *value)
+        else:
+            self.set_multiselect(key, value)
+
+    def set_text(self, key, text):
+        proto = self.widget(key)
+        self.states[proto.id] = WidgetState(id=proto.id, string_value=text)
+
+
+def filter_catalog(df):
+    """Apply the dashboard's cleaning steps that its sidebar filters rely on."""
+    df = df.dropna(subset=['type', 'release_year', 'rating']).copy()
+    df['release_year'] = pd.to_numeric(df['release_year'], errors='coerce')
+    df = df.dropna(subset=['release_year'])
+    df['first_country'] = df['country'].fillna('Unknown').str.split(',').str[0].str.strip()
+    return df
+
+
+def has_rows(catalog, filters):
+    """Whether the dashboard would find any titles for these filter values."""
+    low, high = filters['years']
+    return bool((
+        catalog['type'].isin(filters['type']) &
+        catalog['first_country'].isin(filters['countries']) &
+        catalog['release_year'].between(low, high) &
+        catalog['rating'].isin(filters['ratings'])
+    ).any())
+
+
+def propose_filter(session, key, rng):
+    proto = session.widget(key)
+    if key == 'years':
+        low = rng.randint(int(proto.min), int(proto.max))
+        return (low, rng.randint(low, int(proto.max)))
+    options = list(proto.options)
+    return rng.sample(options, rng.randint(1, len(options)))
+
+
+def apply_action(session, action, rng, catalog, titles):
+    """Mutate the session's widget states for one scripted action.
+
+    Filter changes are only kept when the catalog still has matching titles;
+    if no such value turns up the filter is left as it was.
+
+    Returns the id of a button to trigger on the rerun, if any.
+    """
+    if action in FILTER_ACTIONS:
+        key = FILTER_ACTIONS[action]
+        filters = {k: session.filter_value(k) for k in FILTER_ACTIONS.values()}
+        for _ in range(MAX_FILTER_TRIES):
+            filters[key] = propose_filter(session, key, rng)
+            if has_rows(catalog, filters):
+                session.set_filter(key, filters[key])
+                break
+    elif action == 'search':
+        # Mostly short substrings of real titles, sometimes clearing the box
+        title = rng.choice(titles)
+        session.set_text('search', '' if rng.random() < 0.2 else title[:rng.randint(3, 8)])
+    elif action == 'predict':
+        session.set_text('predict_input', rng.choice(titles))
+        return session.widget('predict_button').id
+    return None
+
+
+async def run_session(url, reruns, seed, catalog, titles, timeout):
+    """Connect one session, load the page, then run the scripted actions.
+
+    Always returns the samples collected so far, even if the rerun times out
+    or the server drops the connection part way through.
+    """
+    rng = random.Random(seed)
+    actions = list(ACTIONS)
+    weights = list(ACTIONS.values())
+    result = {'initial': None, 'latencies': [], 'errors': 0, 'timeouts': 0,
+              'stopped_early': 0, 'disconnected': False}
+    session = None
+
+    try:
+        async with websockets.connect(url, subprotocols=['streamlit'], max_size=None,
+                                      open_timeout=timeout) as ws:
+            session = DashboardSession(ws, timeout)
+            try:
+                elapsed, ok, _ = await session.rerun()
+            except asyncio.TimeoutError:
+                result['timeouts'] += 1
+                return result
+            result['initial'] = elapsed
+            result['errors'] += not ok
+
+            for _ in range(reruns):
+                action = rng.choices(actions, weights)[0]
+                try:
+                    trigger_id = apply_action(session, action, rng, catalog, titles)
+                except LookupError:
+                    result['errors'] += 1
+                    continue
+                try:
+                    elapsed, ok, stopped_early = await session.rerun(trigger_id)
+                except asyncio.TimeoutError:
+                    # The timed-out run may still finish later; its script_finished
+                    # would be mistaken for the next rerun's, so end the session.
+                    result['timeouts'] += 1
+                    break
+                if stopped_early:
+                    result['stopped_early'] += 1
+                else:
+                    result['latencies'].append(elapsed)
+                result['errors'] += not ok
+    except (websockets.exceptions.WebSocketException, OSError):
+        result['disconnected'] = True
+    finally:
+        if session is not None:
+            result['errors'] += session.exceptions
+    return result
+
+
+def server_rss_mb(proc):
+    """Resident memory of the Streamlit server and any child processes."""
+    try:
+        procs = [proc] + proc.children(recursive=True)
+        return sum(p.memory_info().rss for p in procs) / 2**20
+    except psutil.NoSuchProcess:
+        return 0.0
+
+
+async def sample_memory(proc, samples, interval=0.25):
+    while True:
+        samples.append(server_rss_mb(proc))
+        await asyncio.sleep(interval)
+
+
+def percentiles(values):
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None, 'mean': None, 'max': None}
+    ms = np.array(values) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {'p50': round(p50, 1), 'p95': round(p95, 1), 'p99': round(p99, 1),
+            'mean': round(ms.mean(), 1), 'max': round(ms.max(), 1)}
+
+
+async def run_level(url, proc, sessions, reruns, catalog, titles, timeout, seed):
+    """Run ``sessions`` concurrent sessions and summarise the level."""
+    idle_mb = server_rss_mb(proc)
+    samples = []
+    sampler = asyncio.create_task(sample_memory(proc, samples))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_session(url, reruns, seed + i, catalog, titles, timeout)
+          for i in range(sessions)),
+    )
+    wall = time.perf_counter() - start
+    sampler.cancel()
+
+    latencies, initial = [], []
+    for result in results:
+        latencies.extend(result['latencies'])
+        if result['initial'] is not None:
+            initial.append(result['initial'])
+
+    return {
+        'sessions': sessions,
+        'reruns': len(latencies),
+        'errors': sum(result['errors'] for result in results),
+        'timeouts': sum(result['timeouts'] for result in results),
+        'stopped_early': sum(result['stopped_early'] for result in results),
+        'disconnected_sessions': sum(result['disconnected'] for result in results),
+        'wall_s': round(wall, 2),
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else None,
+        'rerun_ms': percentiles(latencies),
+        'initial_load_ms': percentiles(initial),
+        'rss_mb': {'idle': round(idle_mb, 1), 'peak': round(max(samples + [idle_mb]), 1)},
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def prepare_workdir(workdir, catalog):
+    """Copy the dashboard next to a (possibly enlarged) copy of the dataset."""
+    shutil.copy(os.path.join(APP_DIR, APP_SCRIPT), workdir)
+    catalog.to_csv(os.path.join(workdir, DATASET), index=False)
+
+
+def scale_catalog(df, multiplier):
+    """Replicate the catalog ``multiplier`` times with unique show ids."""
+    if multiplier == 1:
+        return df
+    copies = []
+    for i in range(multiplier):
+        copy = df.copy()
+        if i:
+            copy['show_id'] = copy['show_id'] + f'-{i}'
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def log_tail(path, lines=20):
+    with open(path, errors='replace') as f:
+        return ''.join(f.readlines()[-lines:])
+
+
+def start_server(workdir, port, startup_timeout):
+    log_path = os.path.join(workdir, 'streamlit.log')
+    # The child keeps its own handle to the log, so ours can be closed right away
+    with open(log_path, 'w') as log:
+        proc = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', APP_SCRIPT,
+             '--server.headless', 'true',
+             '--server.port', str(port),
+             '--server.address', '127.0.0.1',
+             '--server.fileWatcherType', 'none',
+             '--browser.gatherUsageStats', 'false'],
+            cwd=workdir, stdout=log, stderr=subprocess.STDOUT,
+        )
+    health = f'http://127.0.0.1:{port}/_stcore/health'
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            # The workdir is removed on the way out, so surface the log here
+            raise RuntimeError(f"Streamlit exited early:\n{log_tail(log_path)}")
+        try:
+            with urllib.request.urlopen(health, timeout=1) as response:
+                if response.status == 200:
+                    return proc
+        except OSError:
+            time.sleep(0.25)
+    stop_server(proc)
+    raise RuntimeError(f"Streamlit did not become healthy within {startup_timeout}s:\n"
+                       f"{log_tail(log_path)}")
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR,
+            stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def working_tree_dirty():
+    try:
+        status = subprocess.check_output(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=APP_DIR,
+            stderr=subprocess.DEVNULL, text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    return bool(status.strip())
+
+
+def print_level(rows, level):
+    rerun = level['rerun_ms']
+    print(f"  rows={rows:>7,}  sessions={level['sessions']:>4}  "
+          f"p50={rerun['p50']}ms  p95={rerun['p95']}ms  p99={rerun['p99']}ms  "
+          f"rps={level['throughput_rps']}  rss_peak={level['rss_mb']['peak']}MB  "
+          f"errors={level['errors']}  timeouts={level['timeouts']}  "
+          f"stopped_early={level['stopped_early']}  "
+          f"disconnected={level['disconnected_sessions']}")
+
+
+def run(args):
+    revision = git_revision()
+    dirty = working_tree_dirty()
+    label = args.label or (f'{revision}-dirty' if dirty else revision)
+    path = os.path.join(args.output_dir, f'{label}.json')
+    if os.path.exists(path) and not args.force:
+        sys.exit(f"{path} already exists; pass --label to name this run or --force to overwrite it")
+
+    base = pd.read_csv(os.path.join(APP_DIR, DATASET))
+    catalog = filter_catalog(base)
+    titles = catalog['title'].dropna().astype(str).tolist()
+    report = {
+        'label': label,
+        'git_revision': revision,
+        'git_dirty': dirty,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'streamlit': streamlit.__version__,
+        'cpu_count': os.cpu_count(),
+        'config': {'sessions': args.sessions, 'catalog_multipliers': args.catalog_multipliers,
+                   'reruns_per_session': args.reruns, 'seed': args.seed},
+        'results': [],
+    }
+
+    for multiplier in args.catalog_multipliers:
+        scaled = scale_catalog(base, multiplier)
+        with tempfile.TemporaryDirectory(prefix='netflix-loadtest-') as workdir:
+            prepare_workdir(workdir, scaled)
+            port = args.port or free_port()
+            proc = start_server(workdir, port, args.startup_timeout)
+            url = f'ws://127.0.0.1:{port}/_stcore/stream'
+            try:
+                server = psutil.Process(proc.pid)
+                # Warm up once so model training and the data cache are excluded
+                asyncio.run(run_session(url, 0, args.seed, catalog, titles,
+                                        args.startup_timeout))
+                entry = {'catalog_multiplier': multiplier, 'catalog_rows': len(scaled),
+                         'levels': []}
+                for sessions in args.sessions:
+                    level = asyncio.run(run_level(url, server, sessions, args.reruns, catalog,
+                                                  titles, args.timeout, args.seed))
+                    print_level(len(scaled), level)
+                    entry['levels'].append(level)
+                report['results'].append(entry)
+            finally:
+                stop_server(proc)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved results to {path}")
+
+
+def compare(paths):
+    """Print p95 latency and throughput side by side for saved runs."""
+    reports = []
+    for path in paths:
+        with open(path) as f:
+            reports.append(json.load(f))
+
+    header = f"{'rows':>8} {'sessions':>8}"
+    for report in reports:
+        header += f" | {report['label'][:20]:>20} p95ms    rps"
+    print(header)
+
+    keys = sorted({(entry['catalog_rows'], level['sessions'])
+                   for report in reports for entry in report['results']
+                   for level in entry['levels']})
+    for rows, sessions in keys:
+        line = f"{rows:>8,} {sessions:>8}"
+        for report in reports:
+            level = next((level for entry in report['results'] if entry['catalog_rows'] == rows
+                          for level in entry['levels'] if level['sessions'] == sessions), None)
+            if level is None:
+                line += f" | {'-':>26} {'-':>6}"
+            else:
+                line += f" | {str(level['rerun_ms']['p95']):>26} {str(level['throughput_rps']):>6}"
+        print(line)
+
+
+def int_list(value):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int_list, default=[1, 5, 10, 25],
+                        help='Comma-separated concurrency levels (default: 1,5,10,25)')
+    parser.add_argument('--catalog-multipliers', type=int_list, default=[1, 4],
+                        help='Comma-separated catalog size multipliers (default: 1,4)')
+    parser.add_argument('--reruns', type=int, default=20,
+                        help='Scripted actions per session (default: 20)')
+    parser.add_argument('--timeout', type=float, default=120,
+                        help='Seconds to wait for a single rerun (default: 120)')
+    parser.add_argument('--startup-timeout', type=float, default=300,
+                        help='Seconds to wait for server start and warm-up (default: 300)')
+    parser.add_argument('--port', type=int, default=None,
+                        help='Port for the Streamlit server (default: a free port)')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Seed for the scripted session actions (default: 42)')
+    parser.add_argument('--label', default=None,
+                        help='Name of this run in the results (default: git revision, '
+                             'with a -dirty suffix for uncommitted changes)')
+    parser.add_argument('--force', action='store_true',
+                        help='Overwrite an existing results file with the same label')
+    parser.add_argument('--output-dir', default=RESULTS_DIR,
+                        help='Directory for the results JSON (default: load_test_results)')
+    parser.add_argument('--compare', nargs='+', metavar='RESULTS_JSON',
+                        help='Compare saved result files instead of running a test')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.compare:
+        compare(args.compare)
+    else:
+        run(args)